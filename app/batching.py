@@ -0,0 +1,91 @@
+"""Micro-batching of ML predictions for the async /predict endpoint.
+
+A 1-row predict_proba is mostly sklearn's fixed per-call overhead (validation,
+sparse conversion...). Concurrent requests are queued for a few milliseconds and
+sent to TxModel.predict_batch together, then each caller gets its own result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional, Tuple
+
+from app.ml_model import MlPrediction, Tx, TxModel
+
+# A queued transaction and the future its caller is waiting on
+Pending = Tuple[Tx, "asyncio.Future[Optional[MlPrediction]]"]
+
+
+class MicroBatcher:
+    def __init__(self, model: TxModel, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        # Created once: restarting the worker must not drop already queued requests
+        self._queue: asyncio.Queue[Pending] = asyncio.Queue()
+        self._worker: Optional[asyncio.Task[None]] = None
+
+    async def submit(self, tx: Tx) -> Optional[MlPrediction]:
+        """Queue one transaction and wait for its prediction (cache hits skip the queue)."""
+        pred = self.model.cached(tx)
+        if pred is not None:
+            return pred
+        if self._worker is None or self._worker.done():
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((tx, future))
+        return await future
+
+    def start(self) -> None:
+        """Start the background worker on the running event loop."""
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _collect(self) -> List[Pending]:
+        """Wait for a first item, then gather more until the batch is full or max_wait is over."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            txs = [tx for tx, _ in batch]
+            try:
+                # Off the event loop: predict_batch is CPU-bound
+                preds = await asyncio.to_thread(self.model.predict_batch, txs)
+            except Exception:
+                # One bad input must not fail the whole batch: retry each item alone
+                await self._run_one_by_one(batch)
+                continue
+            for i, (_, future) in enumerate(batch):
+                if not future.done():  # caller may have gone away
+                    future.set_result(preds[i] if i < len(preds) else None)
+
+    async def _run_one_by_one(self, batch: List[Pending]) -> None:
+        for tx, future in batch:
+            try:
+                preds = await asyncio.to_thread(self.model.predict_batch, [tx])
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            if not future.done():
+                future.set_result(preds[0] if preds else None)
@@ -1,17 +1,54 @@
-from fastapi import FastAPI
-from pydantic import BaseModel, Field
+import asyncio
+import math
+from contextlib import asynccontextmanager
+from typing import Sequence
 
-from app.model import predict_transaction
+import msgspec
+from fastapi import FastAPI, HTTPException, Request
 
-app = FastAPI(title="Transaction Categorizer", version="0.1.0")
+from app.batching import MicroBatcher
+from app.ml_model import Tx
+from app.model import load_model, predict_transaction_async
 
 
-class TxIn(BaseModel):
-    date: str = Field(..., description="Date string from CSV, e.g. 01/10/2025")
-    type: str = Field(..., description="Transaction type from CSV")
-    description: str = Field(..., description="Bank description / merchant label")
-    montant: float = Field(..., description="Amount (positive number)")
-    sens: str = Field(..., description="DEBIT or CREDIT")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load once per worker at startup, off the event loop (no import-time side effects)
+    app.state.ml = await asyncio.to_thread(load_model)
+    # Groups concurrent ML fallbacks into one predict call
+    app.state.batcher = MicroBatcher(app.state.ml) if app.state.ml is not None else None
+    yield
+    if app.state.batcher is not None:
+        await app.state.batcher.stop()
+
+
+app = FastAPI(title="Transaction Categorizer", version="0.1.0", lifespan=lifespan)
+
+
+# msgspec validates while decoding, in C, straight into the Tx TypedDict: no Pydantic
+# model and no copy per request. strict=False keeps Pydantic's lax behaviour
+# (e.g. "12.5" accepted for montant).
+_tx_decoder = msgspec.json.Decoder(Tx, strict=False)
+
+# The body is read by hand, so document it for /docs explicitly
+_TX_FIELD_DOCS = {
+    "date": "Date string from CSV, e.g. 01/10/2025",
+    "type": "Transaction type from CSV",
+    "description": "Bank description / merchant label",
+    "montant": "Amount (positive number)",
+    "sens": "DEBIT or CREDIT",
+}
+_TX_SCHEMA = msgspec.json.schema_components([Tx])[1]["Tx"]
+for _name, _doc in _TX_FIELD_DOCS.items():
+    _TX_SCHEMA["properties"][_name]["description"] = _doc
+
+
+def _invalid_body(msg: str, loc: Sequence[str] = ("body",)) -> HTTPException:
+    """422 with the same detail shape FastAPI uses for validation errors."""
+    return HTTPException(
+        status_code=422,
+        detail=[{"loc": list(loc), "msg": msg, "type": "value_error"}],
+    )
 
 
 @app.get("/health")
@@ -19,8 +56,16 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/predict")
-def predict(tx: TxIn):
+@app.post(
+    "/predict",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _TX_SCHEMA}},
+        },
+    },
+)
+async def predict(request: Request):
     """
     Predict category/subcategory for a transaction.
 
@@ -31,4 +76,11 @@ def predict(tx: TxIn):
       - method ("rules" | "fallback")
       - rule_id (optional)
     """
-    return predict_transaction(tx.model_dump())
\ No newline at end of file
+    try:
+        tx = _tx_decoder.decode(await request.body())
+    except msgspec.DecodeError as exc:
+        raise _invalid_body(str(exc))
+    # Lax decoding accepts "nan" / "inf" strings, which the model can't score
+    if not math.isfinite(tx["montant"]):
+        raise _invalid_body("Input should be a finite number", ("body", "montant"))
+    return await predict_transaction_async(tx, request.app.state.batcher)
@@ -1,20 +1,40 @@
 """Place this file as: app/ml_model.py
 
 Loads the sklearn pipeline trained by train.py and exposes:
-- TxModel.predict(tx_dict) -> MlPrediction(category, subcategory, confidence)
+- Tx: the transaction dict the API hands over (already validated)
+- TxModel.predict(tx) -> MlPrediction(category, subcategory, confidence)
+- TxModel.predict_batch([tx, ...]) -> [MlPrediction, ...]
+- TxModel.cached(tx) -> MlPrediction if already predicted recently, else None
 """
 
 from __future__ import annotations
 
+import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Dict, List, Optional, Sequence, Tuple, TypedDict
 
 import joblib
 import numpy as np
-import pandas as pd
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_MODEL_PATH = Path(__file__).parent / "models" / "tx_model.joblib"
+CACHE_SIZE = 8192
+
+# (description, type, sens, montant) as fed to the model
+CacheKey = Tuple[str, str, str, float]
+
+class Tx(TypedDict):
+    date: str
+    type: str
+    description: str
+    montant: float
+    sens: str
+
 
 @dataclass(frozen=True)
 class MlPrediction:
@@ -23,60 +43,141 @@ class MlPrediction:
     confidence: float
 
 
-def _parse_amount(x) -> float:
-    if x is None:
-        return 0.0
-    s = str(x).strip().replace(" ", "").replace(",", ".")
-    try:
-        return float(s)
-    except ValueError:
-        return 0.0
+def _cache_key(tx: Tx) -> CacheKey:
+    # The TF-IDF lowercases and tokenizes on words: case and runs of spaces don't matter
+    desc = " ".join(tx["description"].split()).lower()
+    return (desc, tx["type"], tx["sens"], round(tx["montant"], 2))
 
 
 class TxModel:
     def __init__(self, model_path: Path = DEFAULT_MODEL_PATH):
         self.model_path = Path(model_path)
         self.pipeline = None
+        # Fitted pieces of the pipeline, applied directly in predict()
+        self._tfidf = None
+        self._onehot_index: Dict[tuple, int] = {}
+        self._n_extra = 0
+        self._scale = 1.0
+        self._clf = None
+        # LRU of recent predictions: the same merchants come back all the time.
+        # Not functools.lru_cache, since predict_batch fills it with a whole batch at once.
+        self._cache: "OrderedDict[CacheKey, MlPrediction]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def load(self) -> None:
-
         if not self.model_path.exists():
-            print("not loaded")
             raise FileNotFoundError(
                 f"ML model not found at {self.model_path}. Train it first with train.py."
             )
-        print("loaded loaded")
-        self.pipeline = joblib.load(self.model_path)
+        logger.info("Loading ML model from %s", self.model_path)
+        # Memory-map the numpy arrays (coef_, idf_...): read-only pages shared by the
+        # kernel across forked workers instead of one copy per worker heap.
+        # Needs an uncompressed dump, see train.py.
+        self.pipeline = joblib.load(self.model_path, mmap_mode="r")
+        self._unpack_pipeline()
+        self._cache.clear()
+
+    def _unpack_pipeline(self) -> None:
+        """
+        Grab the fitted transformers out of the pipeline so predict() can apply
+        them to plain Python values instead of building a one-row DataFrame
+        (which costs more than the prediction itself).
+        """
+        pre = self.pipeline.named_steps["preprocess"].named_transformers_
+        self._tfidf = pre["desc_tfidf"]
+
+        # (column, category) -> position in the one-hot block.
+        # Only valid for a plain encoder: dropped or grouped categories shift columns.
+        onehot = pre["cat_onehot"]
+        infrequent = getattr(onehot, "infrequent_categories_", None)
+        if onehot.drop is not None or (
+            infrequent is not None and any(c is not None for c in infrequent)
+        ):
+            raise ValueError(
+                "TxModel expects OneHotEncoder(drop=None) without infrequent-category "
+                "grouping; update TxModel._unpack_pipeline to match train.py."
+            )
+        index: Dict[tuple, int] = {}
+        for col, cats in enumerate(onehot.categories_):
+            for cat in cats:
+                index[(col, cat)] = len(index)
+        self._onehot_index = index
+        self._n_extra = len(index) + 1  # one-hot block + scaled amount
+
+        scale = pre["num"].named_steps["scaler"].scale_
+        self._scale = float(scale[0]) if scale is not None else 1.0
+        self._clf = self.pipeline.named_steps["clf"]
 
     def is_loaded(self) -> bool:
         return self.pipeline is not None
 
-    def predict(self, tx: Dict[str, Any]) -> Optional[MlPrediction]:
+    def predict(self, tx: Tx) -> Optional[MlPrediction]:
         if not self.is_loaded():
             return None
+        return self.predict_batch([tx])[0]
+
+    def cached(self, tx: Tx) -> Optional[MlPrediction]:
+        """Cached prediction for tx, or None: lets callers skip the batching queue on hits."""
+        key = _cache_key(tx)
+        with self._cache_lock:
+            pred = self._cache.get(key)
+            if pred is not None:
+                self._cache.move_to_end(key)
+            return pred
+
+    def predict_batch(self, txs: Sequence[Tx]) -> List[MlPrediction]:
+        """Predict several transactions with a single classifier call (cache misses only)."""
+        if not self.is_loaded() or not txs:
+            return []
+
+        keys = [_cache_key(tx) for tx in txs]
+        found: Dict[CacheKey, MlPrediction] = {}
+        with self._cache_lock:
+            for key in keys:
+                pred = self._cache.get(key)
+                if pred is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = pred
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            preds = self._predict_keys(missing)
+            found.update(zip(missing, preds))
+            with self._cache_lock:
+                self._cache.update(zip(missing, preds))
+                while len(self._cache) > CACHE_SIZE:
+                    self._cache.popitem(last=False)
+
+        return [found[key] for key in keys]
+
+    def _predict_keys(self, keys: Sequence[CacheKey]) -> List[MlPrediction]:
+        X_desc = self._tfidf.transform([key[0] for key in keys])
+        # Same layout as the ColumnTransformer: [tfidf | one-hot(Type, Sens) | MontantNum]
+        extra = np.zeros((len(keys), self._n_extra), dtype=X_desc.dtype)
+        for row, (_, typ, sens, montant) in enumerate(keys):
+            for col, value in enumerate((typ, sens)):
+                pos = self._onehot_index.get((col, value))  # unknown => all zeros
+                if pos is not None:
+                    extra[row, pos] = 1.0
+            extra[row, -1] = montant / self._scale
+        X = sparse.hstack([X_desc, extra], format="csr")
+
+        if hasattr(self._clf, "predict_proba"):
+            proba = self._clf.predict_proba(X)
+            best = np.argmax(proba, axis=1)
+            labels = self._clf.classes_[best]
+            confidences = proba[np.arange(len(keys)), best]
+        else:
+            labels = self._clf.predict(X)
+            confidences = np.zeros(len(keys))
 
-        desc = str(tx.get("description", "") or "")
-        typ = str(tx.get("type", "") or "")
-        sens = str(tx.get("sens", "") or "")
-        montant = _parse_amount(tx.get("montant", 0.0))
-
-        X = pd.DataFrame([{
-            "Description": desc,
-            "Type": typ,
-            "Sens": sens,
-            "MontantNum": montant,
-        }])
-
-        label = self.pipeline.predict(X)[0]
+        return [_to_prediction(label, float(conf)) for label, conf in zip(labels, confidences)]
 
-        confidence = 0.0
-        if hasattr(self.pipeline, "predict_proba"):
-            proba = self.pipeline.predict_proba(X)[0]
-            confidence = float(np.max(proba))
 
-        if " / " in label:
-            category, subcategory = label.split(" / ", 1)
-        else:
-            category, subcategory = label, ""
+def _to_prediction(label: str, confidence: float) -> MlPrediction:
+    if " / " in label:
+        category, subcategory = label.split(" / ", 1)
+    else:
+        category, subcategory = label, ""
 
-        return MlPrediction(category=category, subcategory=subcategory, confidence=confidence)
+    return MlPrediction(category=category, subcategory=subcategory, confidence=confidence)
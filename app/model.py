@@ -1,49 +1,50 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import logging
+from typing import Any, Dict, Optional, Tuple
 
+from app.batching import MicroBatcher
 from app.rules import predict_by_rules
 
 # Put ml_model.py into app/ml_model.py and import it like below
-from app.ml_model import TxModel
+from app.ml_model import MlPrediction, Tx, TxModel
 
-_ml = TxModel()
-try:
-    print("Loading ml")
-    _ml.load()
-except Exception:
-    print("ml not trained yet")
-    # Model not trained yet => rules-only mode
-    _ml = None
+logger = logging.getLogger(__name__)
 
 
-def predict_transaction(tx: Dict[str, Any]) -> Dict[str, Any]:
-    """Rules first, then ML, then fallback."""
-    description = str(tx.get("description", "") or "")
+def load_model() -> Optional[TxModel]:
+    """Load the ML model, or None if it is not trained yet (rules-only mode)."""
+    ml = TxModel()
+    try:
+        ml.load()
+    except Exception:
+        logger.warning("ML model not available, running in rules-only mode", exc_info=True)
+        return None
+    return ml
 
-    rule_result = predict_by_rules(description)
-    if rule_result is not None:
-        category, subcategory, rule_id = rule_result
-        return {
-            "category": category,
-            "subcategory": subcategory,
-            "confidence": 1.0,
-            "method": "rules",
-            "rule_id": rule_id,
-        }
-
-    if _ml is not None:
-        print ("prediction applying")
-        pred = _ml.predict(tx)
-        if pred is not None:
-            return {
-                "category": pred.category,
-                "subcategory": pred.subcategory,
-                "confidence": pred.confidence,
-                "method": "ml",
-                "rule_id": None,
-            }
 
+def _rule_response(rule_result: Tuple[str, str, str]) -> Dict[str, Any]:
+    category, subcategory, rule_id = rule_result
+    return {
+        "category": category,
+        "subcategory": subcategory,
+        "confidence": 1.0,
+        "method": "rules",
+        "rule_id": rule_id,
+    }
+
+
+def _ml_response(pred: MlPrediction) -> Dict[str, Any]:
+    return {
+        "category": pred.category,
+        "subcategory": pred.subcategory,
+        "confidence": pred.confidence,
+        "method": "ml",
+        "rule_id": None,
+    }
+
+
+def _fallback_response() -> Dict[str, Any]:
     return {
         "category": "UNKNOWN",
         "subcategory": None,
@@ -51,3 +52,19 @@ def predict_transaction(tx: Dict[str, Any]) -> Dict[str, Any]:
         "method": "fallback",
         "rule_id": None,
     }
+
+
+async def predict_transaction_async(
+    tx: Tx, batcher: Optional[MicroBatcher] = None
+) -> Dict[str, Any]:
+    """Rules first, then ML (through the micro-batcher), then fallback."""
+    rule_result = predict_by_rules(tx["description"])
+    if rule_result is not None:
+        return _rule_response(rule_result)
+
+    if batcher is not None:
+        pred = await batcher.submit(tx)
+        if pred is not None:
+            return _ml_response(pred)
+
+    return _fallback_response()
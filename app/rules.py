@@ -1,22 +1,38 @@
 from __future__ import annotations
 
+import logging
 import re
-from dataclasses import dataclass
-from typing import Optional, Tuple, List
+import threading
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, List, cast
+
+import ahocorasick  # type: ignore[import-not-found]
+
+try:
+    import hyperscan  # type: ignore[import-not-found, unused-ignore]
+    HAS_HYPERSCAN = True
+except ImportError:  # only available on x86-64: fall back to Aho-Corasick + regex
+    HAS_HYPERSCAN = False
+
+logger = logging.getLogger(__name__)
+
+_WS = re.compile(r"\s+")
+
 
 def normalize_description(text: str) -> str:
     """Normalize bank descriptions to make matching more robust."""
     if text is None:
         return ""
     s = str(text).strip().upper()
-    s = re.sub(r"\s+", " ", s)
+    s = _WS.sub(" ", s)
     return s
 
 
 @dataclass(frozen=True)
 class Rule:
     id: str
-    pattern: re.Pattern
+    pattern: re.Pattern[str]
     category: str
     subcategory: str
 
@@ -120,15 +136,149 @@ RULES: List[Rule] = [
     Rule(id="R095", pattern=re.compile(r"\bZENPARK\b.*"), category="CHARGES_VARIABLES", subcategory="STATIONNEMENT_PEAGES"),
 ]
 
+
+def _upper_pattern(src: str) -> str:
+    """Uppercase the literal parts of a pattern, leaving escapes (\\b, \\s...) alone."""
+    out = []
+    chars = iter(src)
+    for c in chars:
+        if c == "\\":
+            out.append(c + next(chars, ""))
+        else:
+            out.append(c.upper())
+    return "".join(out)
+
+
+# Descriptions are uppercased by normalize_description, so the patterns must be too
+# (mixed-case ones such as "Interest payment" could otherwise never match).
+RULES = [replace(r, pattern=re.compile(_upper_pattern(r.pattern.pattern))) for r in RULES]
+
+# Regex metacharacters; a pattern using none of them unescaped is a plain literal.
+_META_CHARS = set(".^$*+?{}[]|()")
+
+
+def _literal(src: str) -> Optional[str]:
+    """Return the literal text of a pattern, or None if it needs the regex engine."""
+    out = []
+    chars = iter(src)
+    for c in chars:
+        if c == "\\":
+            c = next(chars, "")
+            if not c or c.isalnum():
+                # \b, \s, ... are real regex constructs
+                return None
+        elif c in _META_CHARS:
+            return None
+        out.append(c)
+    return "".join(out)
+
+
+# Rank of each rule in RULES: lower wins.
+PRIORITY: Dict[str, int] = {r.id: i for i, r in enumerate(RULES)}
+META: Dict[str, Tuple[str, str]] = {r.id: (r.category, r.subcategory) for r in RULES}
+
+Scanner = Callable[[str], Optional[str]]
+
+
+def _build_automaton_scanner() -> Scanner:
+    """Scanner returning the id of the first matching rule, via Aho-Corasick + regex."""
+    # Literal rules (the vast majority) go into one Aho-Corasick automaton:
+    # a single walk over the description finds every literal hit at once.
+    automaton = ahocorasick.Automaton()
+    regex_rules: List[Rule] = []
+    for rule in RULES:
+        lit = _literal(rule.pattern.pattern)
+        if lit:
+            automaton.add_word(lit, (PRIORITY[rule.id], rule.id))
+        else:
+            regex_rules.append(rule)
+    automaton.make_automaton()
+
+    # The few remaining rules are folded into a single regex, compiled once.
+    # Each rule is a lookahead anchored at position 0, so the alternation is tried
+    # in RULES order and "first match wins" is preserved (a plain alternation used
+    # with search() would return the leftmost match instead).
+    combined = re.compile(
+        "|".join(f"(?=.*?(?P<{r.id}>{r.pattern.pattern}))" for r in regex_rules)
+    )
+
+    def scan(d: str) -> Optional[str]:
+        best = min((hit for _, hit in automaton.iter(d)), default=None)
+        m = combined.match(d)
+        rule_id = m.lastgroup if m is not None else None
+        if rule_id is not None and (best is None or PRIORITY[rule_id] < best[0]):
+            return rule_id
+        return best[1] if best is not None else None
+
+    return scan
+
+
+def _on_hs_match(rule_index: int, start: int, end: int, flags: int, hits: object) -> None:
+    cast(List[int], hits).append(rule_index)
+
+
+def _build_hyperscan_scanner() -> Scanner:
+    """
+    Scanner returning the id of the first matching rule, via one Hyperscan database.
+    Raises hyperscan.error if a pattern is not supported by Hyperscan.
+    """
+    # Hyperscan matches every rule in one SIMD scan of the description.
+    # Its \b is ASCII-only (no UCP support), so it is used as a prefilter: candidates
+    # are confirmed with the original pattern, lowest RULES index first.
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[r.pattern.pattern.encode("utf-8") for r in RULES],
+        ids=list(range(len(RULES))),
+        elements=len(RULES),
+        flags=[hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_SINGLEMATCH] * len(RULES),
+    )
+    # Hyperscan scratch space cannot be shared between concurrent scans
+    local = threading.local()
+
+    def scan(d: str) -> Optional[str]:
+        scratch = getattr(local, "scratch", None)
+        if scratch is None:
+            scratch = local.scratch = hyperscan.Scratch(db)
+
+        hits: List[int] = []
+        db.scan(d.encode("utf-8"), match_event_handler=_on_hs_match, context=hits, scratch=scratch)
+        for i in sorted(hits):
+            rule = RULES[i]
+            if rule.pattern.search(d):
+                return rule.id
+        return None
+
+    return scan
+
+
+def _build_scanner() -> Scanner:
+    """Hyperscan when installed and able to compile every rule, else Aho-Corasick + regex."""
+    if HAS_HYPERSCAN:
+        try:
+            return _build_hyperscan_scanner()
+        except hyperscan.error:
+            logger.warning("Hyperscan can't compile RULES, using Aho-Corasick + regex", exc_info=True)
+    return _build_automaton_scanner()
+
+
+# Only the engine actually used gets built
+_scan = _build_scanner()
+
+
+@lru_cache(maxsize=4096)
+def _rules_lookup(d: str) -> Optional[Tuple[str, str, str]]:
+    """Rule scan on an already normalized description (cached: merchants recur a lot)."""
+    rule_id = _scan(d)
+    if rule_id is None:
+        return None
+    return META[rule_id] + (rule_id,)
+
+
 def predict_by_rules(description: str) -> Optional[Tuple[str, str, str]]:
     """
     Returns (category, subcategory, rule_id) if a rule matches, else None.
     """
-    d = normalize_description(description)
-    for rule in RULES:
-        if rule.pattern.search(d):
-            return (rule.category, rule.subcategory, rule.id)
-    return None
+    return _rules_lookup(normalize_description(description))
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@
 - Saves a single sklearn Pipeline to models/tx_model.joblib.
 
 Why a single Pipeline?
-- It bundles preprocessing (TF-IDF, one-hot, scaling) + classifier.
+- It bundles preprocessing (hashed TF-IDF, one-hot, scaling) + classifier.
 - In production you just load the pipeline and call predict / predict_proba.
 
 Usage:
@@ -24,10 +24,11 @@ import joblib
 import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import SGDClassifier
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report
 from sklearn.model_selection import train_test_split
+from sklearn.multiclass import OneVsRestClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
@@ -35,15 +36,15 @@ from sklearn.preprocessing import OneHotEncoder, StandardScaler
 REQUIRED_COLUMNS = ["Description", "Category", "Subcategory"]
 
 
-def parse_amount(x) -> float:
-    """Parse 'Montant' that may use comma decimals (e.g. '29,21')."""
-    if x is None or (isinstance(x, float) and np.isnan(x)):
-        return 0.0
-    s = str(x).strip().replace(" ", "").replace(",", ".")
-    try:
-        return float(s)
-    except ValueError:
-        return 0.0
+def parse_amounts(values: pd.Series) -> pd.Series:
+    """Parse 'Montant' values that may use comma decimals (e.g. '29,21'); unparseable => 0.0."""
+    s = (
+        values.astype(str)
+        .str.strip()
+        .str.replace(" ", "", regex=False)
+        .str.replace(",", ".", regex=False)
+    )
+    return pd.to_numeric(s, errors="coerce").fillna(0.0).astype(float)
 
 
 def load_and_clean(csv_path: str) -> pd.DataFrame:
@@ -64,7 +65,7 @@ def load_and_clean(csv_path: str) -> pd.DataFrame:
     # Optional fields
     df["Type"] = df["Type"].fillna("").astype(str) if "Type" in df.columns else ""
     df["Sens"] = df["Sens"].fillna("").astype(str) if "Sens" in df.columns else ""
-    df["MontantNum"] = df["Montant"].apply(parse_amount) if "Montant" in df.columns else 0.0
+    df["MontantNum"] = parse_amounts(df["Montant"]) if "Montant" in df.columns else 0.0
 
     # Target label = combined
     df["Label"] = df["Category"] + " / " + df["Subcategory"]
@@ -74,19 +75,30 @@ def load_and_clean(csv_path: str) -> pd.DataFrame:
 def build_pipeline() -> Pipeline:
     """
     Baseline model (fast):
-    - TF-IDF on Description (bigrams)
-    - SGDClassifier with log_loss (gives predict_proba)
+    - TF-IDF on hashed Description tokens (bigrams)
+    - LogisticRegression with liblinear, one-vs-rest (C code, fast on small sparse TF-IDF; gives predict_proba)
     - Add a bit of structure (Type, Sens, Montant)
     """
     preprocessor = ColumnTransformer(
         transformers=[
-            ("desc_tfidf", TfidfVectorizer(
-                lowercase=True,
-                ngram_range=(1, 2),
-                min_df=1,
-                max_features=12000,
-            ), "Description"),
-            ("cat_onehot", OneHotEncoder(handle_unknown="ignore"), ["Type", "Sens"]),
+            # Hashing instead of a fitted vocabulary: no per-token dict lookup at
+            # inference and nothing vocabulary-sized to pickle. norm=None so the
+            # TF-IDF step sees raw counts (same as TfidfVectorizer).
+            # Tokenization keeps sklearn's default CPython `re` token pattern: RE2
+            # (google-re2) was ~13x slower on short bank labels (per-call binding
+            # overhead) and its \b is ASCII-only, which splits words like "café".
+            ("desc_tfidf", Pipeline(steps=[
+                ("hash", HashingVectorizer(
+                    lowercase=True,
+                    ngram_range=(1, 2),
+                    n_features=2**14,
+                    alternate_sign=False,
+                    norm=None,
+                    dtype=np.float32,
+                )),
+                ("tfidf", TfidfTransformer()),
+            ]), "Description"),
+            ("cat_onehot", OneHotEncoder(handle_unknown="ignore", dtype=np.float32), ["Type", "Sens"]),
             ("num", Pipeline(steps=[
                 ("scaler", StandardScaler(with_mean=False)),
             ]), ["MontantNum"]),
@@ -95,13 +107,14 @@ def build_pipeline() -> Pipeline:
         sparse_threshold=0.3,
     )
 
-    clf = SGDClassifier(
-        loss="log_loss",
-        max_iter=2000,
-        tol=1e-3,
+    # liblinear is binary-only in recent sklearn: wrap it for one-vs-rest
+    clf = OneVsRestClassifier(LogisticRegression(
+        solver="liblinear",
+        C=1.0,
+        max_iter=1000,
         class_weight="balanced",
         random_state=42,
-    )
+    ))
 
     return Pipeline(steps=[
         ("preprocess", preprocessor),
@@ -109,6 +122,18 @@ def build_pipeline() -> Pipeline:
     ])
 
 
+def to_float32(model: Pipeline) -> Pipeline:
+    """
+    Store the fitted classifier weights as float32.
+    Inference is a sparse x dense product, bound by memory traffic: half the bytes.
+    """
+    clf = model.named_steps["clf"]
+    for est in getattr(clf, "estimators_", [clf]):
+        est.coef_ = est.coef_.astype(np.float32)
+        est.intercept_ = est.intercept_.astype(np.float32)
+    return model
+
+
 def safe_train_test_split(X, y, test_size=0.2, random_state=42) -> Tuple:
     """Try stratified split; if some labels are too small, fall back."""
     counts = pd.Series(y).value_counts()
@@ -135,6 +160,7 @@ def main():
 
     model = build_pipeline()
     model.fit(X_train, y_train)
+    to_float32(model)
 
     y_pred = model.predict(X_test)
     report_txt = classification_report(y_test, y_pred, zero_division=0)
@@ -144,7 +170,8 @@ def main():
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, out_path)
+    # Uncompressed, so TxModel can load it with mmap_mode="r"
+    joblib.dump(model, out_path, compress=0)
 
     report_data = {
         "rows_total": int(len(df)),
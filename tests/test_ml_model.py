@@ -0,0 +1,100 @@
+"""TxModel builds features by hand: it must agree with the sklearn pipeline it unpacks."""
+
+import itertools
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml_model import DEFAULT_MODEL_PATH, TxModel
+from app.train import build_pipeline, to_float32
+
+DESCRIPTIONS = ["Unknown shop", "CB INTERMARCHE 12/10", "Virement de Jean", "amazon", "PAYPAL  EUROPE", ""]
+TYPES = ["Virement", "CB", "Avoir", ""]
+SENS = ["DEBIT", "CREDIT"]
+AMOUNTS = [0.0, 12.5, 1234.5, -300.0]
+
+TXS = [
+    {"date": "01/10/2025", "description": d, "type": t, "sens": s, "montant": a}
+    for d, t, s, a in itertools.product(DESCRIPTIONS, TYPES, SENS, AMOUNTS)
+]
+
+
+def _train_df(n: int = 120) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    merchants = {
+        "ALIMENTATION / COURSES": ["INTERMARCHE", "LIDL", "CARREFOUR CITY"],
+        "ALIMENTATION / RESTAURANTS": ["MCDONALDS", "SUSHI SHOP"],
+        "BANQUE / INTERETS": ["Interest payment"],
+        "ACHATS / DIVERS": ["AMAZON PAYMENTS", "FNAC"],
+    }
+    rows = []
+    for i in range(n):
+        label = list(merchants)[i % len(merchants)]
+        names = merchants[label]
+        rows.append({
+            "Description": f"{names[i % len(names)]} {rng.integers(1000, 9999)}",
+            "Type": ["CB", "Virement", "Avoir"][i % 3],
+            "Sens": ["DEBIT", "CREDIT"][i % 2],
+            "MontantNum": float(rng.uniform(1, 300)),
+            "Label": label,
+        })
+    return pd.DataFrame(rows)
+
+
+def _fit_and_save(tmp_path, **params):
+    df = _train_df()
+    pipeline = build_pipeline().set_params(**params)
+    pipeline.fit(df[["Description", "Type", "Sens", "MontantNum"]], df["Label"])
+    to_float32(pipeline)
+    path = tmp_path / "model.joblib"
+    joblib.dump(pipeline, path, compress=0)
+    return path
+
+
+def _assert_matches_pipeline(model: TxModel) -> None:
+    X = pd.DataFrame([{
+        "Description": tx["description"],
+        "Type": tx["type"],
+        "Sens": tx["sens"],
+        "MontantNum": tx["montant"],
+    } for tx in TXS])
+    proba = model.pipeline.predict_proba(X)
+    labels = model.pipeline.classes_[np.argmax(proba, axis=1)]
+
+    preds = model.predict_batch(TXS)
+    got = [f"{p.category} / {p.subcategory}" if p.subcategory else p.category for p in preds]
+    assert got == list(labels)
+    np.testing.assert_allclose([p.confidence for p in preds], proba.max(axis=1), rtol=1e-5)
+
+
+@pytest.mark.skipif(not DEFAULT_MODEL_PATH.exists(), reason="no trained model shipped")
+def test_shipped_model_matches_pipeline():
+    model = TxModel()
+    model.load()
+    _assert_matches_pipeline(model)
+
+
+def test_trained_model_matches_pipeline(tmp_path):
+    model = TxModel(_fit_and_save(tmp_path))
+    model.load()
+    _assert_matches_pipeline(model)
+
+
+def test_cached_prediction_is_identical(tmp_path):
+    model = TxModel(_fit_and_save(tmp_path))
+    model.load()
+    first = model.predict(TXS[0])
+    assert model.cached(TXS[0]) == first
+    assert model.predict(TXS[0]) == first
+
+
+@pytest.mark.parametrize("params", [
+    {"preprocess__cat_onehot__drop": "first"},
+    {"preprocess__cat_onehot__min_frequency": 50},
+])
+def test_unsupported_onehot_encoder_is_refused(tmp_path, params):
+    model = TxModel(_fit_and_save(tmp_path, **params))
+    with pytest.raises(ValueError, match="OneHotEncoder"):
+        model.load()
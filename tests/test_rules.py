@@ -0,0 +1,73 @@
+"""The rule engines must agree with a plain first-match-wins loop over RULES."""
+
+import random
+import re
+from typing import Optional
+
+import pytest
+
+from app import rules
+
+
+def reference_scan(d: str) -> Optional[str]:
+    for rule in rules.RULES:
+        if rule.pattern.search(d):
+            return rule.id
+    return None
+
+
+def _sample_descriptions():
+    # Text each rule is meant to match, alone and inside a longer label
+    texts = [re.sub(r"\\(.)", r"\1", r.pattern.pattern).strip("^$") for r in rules.RULES]
+    samples = list(texts)
+    samples += [f"CB {t} 12/10 4983" for t in texts]
+    samples += [
+        "",
+        "PASS",
+        "  pass ",
+        "PASSAGE",
+        "TOTAL",
+        "XX TOTAL",
+        "ZENPARK",
+        "ZENPARKMAILLERI 4030783",
+        "ÉZENPARK",
+        "AMAZON.FR*ZX9NA3KU4",
+        "AMAZON PAYMENTS VPC",
+        "LEROY MERLIN CHOOSE",
+        "Paiement accepté: FR7616275500000412664270831 à DE74502109007020623696",
+        "nothing to see here",
+    ]
+    # Random mixes: several rules hit at once, so ordering matters
+    rng = random.Random(42)
+    extra = ["FOO", "é", "ZENPARKX", "AMAZON.FR*AB12", "TOTAL", "12/10"]
+    for _ in range(3000):
+        samples.append(" ".join(rng.sample(texts + extra, 3)))
+    return [rules.normalize_description(s) for s in samples]
+
+
+SAMPLES = _sample_descriptions()
+
+
+def test_automaton_scanner_matches_reference():
+    scan = rules._build_automaton_scanner()
+    assert [scan(d) for d in SAMPLES] == [reference_scan(d) for d in SAMPLES]
+
+
+@pytest.mark.skipif(not rules.HAS_HYPERSCAN, reason="hyperscan not installed")
+def test_hyperscan_scanner_matches_reference():
+    scan = rules._build_hyperscan_scanner()
+    assert [scan(d) for d in SAMPLES] == [reference_scan(d) for d in SAMPLES]
+
+
+@pytest.mark.parametrize("description, rule_id", [
+    # Both R087 (VPC) and R089 (AMAZON PAYMENTS) match: the earlier rule wins
+    ("AMAZON PAYMENTS VPC", "R087"),
+    ("AMAZON PRIME FR 2469664", "R092"),
+    ("Amazon.fr*ZX9NA3KU4", "R005"),
+    ("Interest payment", "R048"),
+    ("PASS", "R001"),
+    ("ZENPARKMAILLERI 4030783", None),
+])
+def test_predict_by_rules(description, rule_id):
+    result = rules.predict_by_rules(description)
+    assert (result[2] if result else None) == rule_id